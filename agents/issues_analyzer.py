@@ -2,11 +2,114 @@
 Issues Analyzer Agent
 Extracts and analyzes GitHub issues, PRs, and metadata using GitHub MCP
 """
-import json
-from typing import Dict, List, Any, Optional
+import asyncio
+import heapq
+import logging
+import sys
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from operator import attrgetter
+from typing import Dict, List, Any, Optional, Tuple
+import orjson
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_openai import AzureChatOpenAI
 
+from tools.llm_cache import cached_invoke, compact_json
+
+log = logging.getLogger(__name__)
+
+# GitHub list pagination
+PAGE_SIZE = 100  # GitHub API maximum per_page
+PAGE_PREFETCH = 4  # pages fetched concurrently once page 1 comes back full
+MAX_PAGES = 50  # safety cap per listing
+
+# Max issues serialized into a single LLM prompt
+PROMPT_ISSUE_LIMIT = 50
+
+# Label substrings mapped to the issue type bucket they count towards
+LABEL_KEYWORDS = {
+    "bug": "bugs",
+    "feature": "features",
+    "enhancement": "features",
+    "doc": "documentation"
+}
+
+# Issues and open PRs with only the fields the analyzer keeps, one page of each per request
+ISSUES_AND_PRS_QUERY = """
+query($owner: String!, $name: String!, $pageSize: Int!,
+      $issuesCursor: String, $prsCursor: String,
+      $withIssues: Boolean!, $withPrs: Boolean!) {
+  repository(owner: $owner, name: $name) {
+    issues(first: $pageSize, after: $issuesCursor, states: [OPEN, CLOSED],
+           orderBy: {field: CREATED_AT, direction: DESC}) @include(if: $withIssues) {
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        number title state createdAt updatedAt closedAt url
+        comments { totalCount }
+        labels(first: 20) { nodes { name } }
+        assignees(first: 10) { nodes { login } }
+        author { login }
+        milestone { title }
+      }
+    }
+    pullRequests(first: $pageSize, after: $prsCursor, states: [OPEN],
+                 orderBy: {field: CREATED_AT, direction: DESC}) @include(if: $withPrs) {
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        number title state createdAt updatedAt mergedAt closedAt isDraft url
+        headRefName baseRefName
+        labels(first: 20) { nodes { name } }
+        assignees(first: 10) { nodes { login } }
+        author { login }
+        reviewRequests(first: 10) { nodes { requestedReviewer { ... on User { login } } } }
+      }
+    }
+  }
+}
+"""
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    """Intern low-cardinality strings (states, labels, logins) shared across records"""
+    return sys.intern(value) if value else value
+
+
+@dataclass(slots=True)
+class Issue:
+    """Slim projection of a GitHub issue"""
+    number: int
+    title: str
+    state: str
+    labels: List[str] = field(default_factory=list)
+    created_at: Optional[str] = None
+    updated_at: Optional[str] = None
+    user: Optional[str] = None
+    assignees: List[str] = field(default_factory=list)
+    comments: int = 0
+    url: Optional[str] = None
+    milestone: Optional[str] = None
+    closed_at: Optional[str] = None
+
+
+@dataclass(slots=True)
+class PullRequest:
+    """Slim projection of a GitHub pull request"""
+    number: int
+    title: str
+    state: str
+    user: Optional[str] = None
+    created_at: Optional[str] = None
+    updated_at: Optional[str] = None
+    merged_at: Optional[str] = None
+    closed_at: Optional[str] = None
+    labels: List[str] = field(default_factory=list)
+    draft: bool = False
+    url: Optional[str] = None
+    assignees: List[str] = field(default_factory=list)
+    requested_reviewers: List[str] = field(default_factory=list)
+    head: Optional[str] = None
+    base: Optional[str] = None
+
 
 class IssuesAnalyzerAgent:
     """Agent to analyze GitHub issues and pull requests"""
@@ -27,52 +130,47 @@ class IssuesAnalyzerAgent:
         Analyze repository issues and pull requests
         Returns structured metadata about issues, features, bugs, etc.
         """
-        print(f"\n🐛 Analyzing Issues: {self.owner}/{self.repo}")
-        print("=" * 60)
-        
-        # Step 1: Get open issues
-        print("\n📋 Step 1: Fetching open issues...")
-        open_issues = await self.github.list_issues(
-            self.owner, self.repo, state="open", per_page=100
-        )
-        open_issues_data = self._parse_issues(open_issues) if open_issues else []
-        print(f"  ✅ Found {len(open_issues_data)} open issues")
-        
-        # Step 2: Get closed issues (recent)
-        print("\n📋 Step 2: Fetching closed issues...")
-        closed_issues = await self.github.list_issues(
-            self.owner, self.repo, state="closed", per_page=50
-        )
-        closed_issues_data = self._parse_issues(closed_issues) if closed_issues else []
-        print(f"  ✅ Found {len(closed_issues_data)} closed issues")
-        
-        # Step 2.5: Get ALL issues for better analysis
-        print("\n📋 Step 2.5: Fetching all issues (open + closed)...")
-        all_issues = await self.github.list_issues(
-            self.owner, self.repo, state="all", per_page=100
-        )
-        all_issues_data = self._parse_issues(all_issues) if all_issues else []
-        print(f"  ✅ Found {len(all_issues_data)} total issues")
-        
-        # Step 3: Get pull requests
-        print("\n🔀 Step 3: Fetching pull requests...")
-        prs = await self.github.list_pull_requests(
-            self.owner, self.repo, state="open", per_page=30
+        log.info("\n🐛 Analyzing Issues: %s/%s", self.owner, self.repo)
+        log.info("=" * 60)
+        
+        # Steps 1-3: Fetch all issues (open + closed) and open PRs
+        log.info("\n📋 Steps 1-3: Fetching issues and pull requests...")
+        fetched = await self._fetch_graphql()
+        if fetched:
+            issues_data, prs_data = fetched
+        else:
+            log.warning("  ⚠️  GraphQL fetch failed, falling back to REST listings")
+            issues_data, prs_data = await asyncio.gather(
+                self._fetch_all_pages("issues", "all"),
+                self._fetch_all_pages("prs", "open")
+            )
+        
+        # Deduplicate by issue number (pages can shift while paginating), newest first,
+        # then split by state in memory
+        all_issues_data = sorted(
+            {issue.number: issue for issue in issues_data}.values(),
+            key=lambda x: x.created_at or "",
+            reverse=True
         )
-        prs_data = self._parse_prs(prs) if prs else []
-        print(f"  ✅ Found {len(prs_data)} open PRs")
+        open_issues_data = [i for i in all_issues_data if i.state == "open"]
+        closed_issues_data = [i for i in all_issues_data if i.state == "closed"]
+        log.info("  ✅ Found %d open issues", len(open_issues_data))
+        log.info("  ✅ Found %d closed issues", len(closed_issues_data))
+        log.info("  ✅ Found %d total issues", len(all_issues_data))
+        log.info("  ✅ Found %d open PRs", len(prs_data))
         
         # Step 4: Extract rich metadata directly
-        print("\n📊 Step 4: Extracting issue metadata...")
-        metadata = self._extract_direct_metadata(all_issues_data, prs_data)
+        log.info("\n📊 Step 4: Extracting issue metadata...")
+        aggregates = self._aggregate(all_issues_data, prs_data)
+        metadata = self._extract_direct_metadata(aggregates)
         
         # Step 5: Calculate statistics
-        print("\n📈 Step 5: Calculating statistics...")
-        statistics = self._calculate_statistics(all_issues_data, prs_data)
+        log.info("\n📈 Step 5: Calculating statistics...")
+        statistics = self._calculate_statistics(aggregates)
         
         # Step 6: Extract insights from data
-        print("\n🔍 Step 6: Analyzing insights...")
-        insights = self._extract_insights(all_issues_data, prs_data, metadata)
+        log.info("\n🔍 Step 6: Analyzing insights...")
+        insights = self._extract_insights(all_issues_data, aggregates, statistics)
         
         result = {
             "summary": {
@@ -80,126 +178,331 @@ class IssuesAnalyzerAgent:
                 "total_open_issues": len(open_issues_data),
                 "total_closed_issues": len(closed_issues_data),
                 "total_prs": len(prs_data),
-                "open_prs": len([pr for pr in prs_data if pr.get("state") == "open"]),
-                "merged_prs": len([pr for pr in prs_data if pr.get("merged_at")])
+                "open_prs": aggregates["pr_stats"]["open"],
+                "merged_prs": aggregates["pr_stats"]["merged"]
             },
             "metadata": metadata,
             "statistics": statistics,
             "insights": insights,
-            "recent_issues": all_issues_data[:15] if all_issues_data else [],
-            "recent_prs": prs_data[:15] if prs_data else []
+            "recent_issues": [asdict(i) for i in all_issues_data[:15]],
+            "recent_prs": [asdict(pr) for pr in prs_data[:15]]
         }
         
-        print("\n✅ Issues analysis complete!")
-        print(f"   Total Issues: {len(all_issues_data)}")
-        print(f"   Open Issues: {len(open_issues_data)}")
-        print(f"   Closed Issues: {len(closed_issues_data)}")
-        print(f"   Pull Requests: {len(prs_data)}")
+        log.info("\n✅ Issues analysis complete!")
+        log.info("   Total Issues: %d", len(all_issues_data))
+        log.info("   Open Issues: %d", len(open_issues_data))
+        log.info("   Closed Issues: %d", len(closed_issues_data))
+        log.info("   Pull Requests: %d", len(prs_data))
         
         return result
     
-    def _parse_issues(self, content: str) -> List[Dict[str, Any]]:
-        """Parse issues from GitHub API response"""
-        try:
-            if not content:
-                return []
-            data = json.loads(content)
-            if isinstance(data, list):
-                return [
-                    {
-                        "number": issue.get("number"),
-                        "title": issue.get("title"),
-                        "state": issue.get("state"),
-                        "labels": [label.get("name") for label in issue.get("labels", []) if label and label.get("name")],
-                        "created_at": issue.get("created_at"),
-                        "updated_at": issue.get("updated_at"),
-                        "user": issue.get("user", {}).get("login") if issue.get("user") else None,
-                        "assignees": [a.get("login") for a in issue.get("assignees", []) if a and a.get("login")],
-                        "comments": issue.get("comments", 0),
-                        "body": issue.get("body", "")[:500] if issue.get("body") else "",
-                        "url": issue.get("html_url"),
-                        "milestone": issue.get("milestone", {}).get("title") if issue.get("milestone") else None,
-                        "closed_at": issue.get("closed_at")
-                    }
-                    for issue in data
-                    if issue and not issue.get("pull_request")  # Filter out PRs from issues list
-                ]
+    async def _fetch_graphql(self) -> Optional[Tuple[List[Issue], List[PullRequest]]]:
+        """
+        Fetch all issues and open PRs through GraphQL, requesting only projected fields
+        Issues and PRs share each round trip until one of them runs out of pages
+        Returns (issues, prs), or None if any request fails
+        """
+        issues, prs = [], []
+        variables = {
+            "owner": self.owner,
+            "name": self.repo,
+            "pageSize": PAGE_SIZE,
+            "issuesCursor": None,
+            "prsCursor": None,
+            "withIssues": True,
+            "withPrs": True
+        }
+        
+        # Cursor pagination is inherently sequential (unlike the REST page prefetch),
+        # so each page is cached on disk to keep repeat runs to zero round trips
+        for _ in range(MAX_PAGES):
+            data = await self.github.graphql_cached(
+                self.owner, self.repo, "issues_prs", ISSUES_AND_PRS_QUERY, variables,
+                variables["issuesCursor"], variables["prsCursor"], PAGE_SIZE,
+                variables["withIssues"], variables["withPrs"]
+            )
+            repository = (data or {}).get("repository")
+            if not repository:
+                return None
+            
+            if variables["withIssues"]:
+                connection = repository.get("issues") or {}
+                issues.extend(await asyncio.to_thread(self._parse_issue_nodes, connection.get("nodes", [])))
+                page_info = connection.get("pageInfo") or {}
+                variables["withIssues"] = bool(page_info.get("hasNextPage"))
+                variables["issuesCursor"] = page_info.get("endCursor")
+            
+            if variables["withPrs"]:
+                connection = repository.get("pullRequests") or {}
+                prs.extend(await asyncio.to_thread(self._parse_pr_nodes, connection.get("nodes", [])))
+                page_info = connection.get("pageInfo") or {}
+                variables["withPrs"] = bool(page_info.get("hasNextPage"))
+                variables["prsCursor"] = page_info.get("endCursor")
+            
+            if not variables["withIssues"] and not variables["withPrs"]:
+                return issues, prs
+        
+        log.warning("  ⚠️  Stopped after %d GraphQL pages", MAX_PAGES)
+        return issues, prs
+    
+    async def _fetch_all_pages(self, kind: str, state: str) -> List[Any]:
+        """
+        Fetch every page of issues or PRs
+        Page 1 is fetched alone; if it is full, the following pages are
+        prefetched in concurrent batches until a short page is returned
+        """
+        if kind == "issues":
+            fetch, parse = self.github.list_issues, self._parse_issues
+        else:
+            fetch, parse = self.github.list_pull_requests, self._parse_prs
+        
+        results = []
+        page = 1
+        batch_size = 1
+        while page <= MAX_PAGES:
+            pages = range(page, min(page + batch_size, MAX_PAGES + 1))
+            responses = await asyncio.gather(
+                *[
+                    fetch(self.owner, self.repo, state=state, per_page=PAGE_SIZE, page=p)
+                    for p in pages
+                ],
+                return_exceptions=True
+            )
+            # Pop pages in order so each raw response and its decoded tree can be
+            # freed as soon as it is projected, keeping only the slim records.
+            # Decoding runs in a worker thread so other fetches keep progressing.
+            responses.reverse()
+            while responses:
+                count, records = await asyncio.to_thread(self._parse_page, responses.pop(), parse)
+                results.extend(records)
+                # Short page means we reached the end (raw count, before PR filtering)
+                if count < PAGE_SIZE:
+                    return results
+            page += batch_size
+            batch_size = PAGE_PREFETCH
+        
+        log.warning("  ⚠️  Stopped after %d pages of %s %s", MAX_PAGES, state, kind)
+        return results
+    
+    def _parse_page(self, response: Any, parse) -> Tuple[int, List[Any]]:
+        """Decode and parse one listing page, returning (raw item count, records)"""
+        items = self._load_page(response)
+        return len(items), parse(items)
+    
+    def _load_page(self, response: Any) -> List[Dict[str, Any]]:
+        """Decode a raw GitHub list response into a list of items"""
+        if isinstance(response, BaseException):
+            log.warning("  ⚠️  GitHub request failed: %s", response)
+            return []
+        if not response:
             return []
+        try:
+            data = orjson.loads(response)
+            return data if isinstance(data, list) else []
         except Exception as e:
-            print(f"  ⚠️  Error parsing issues: {e}")
+            log.warning("  ⚠️  Error decoding GitHub response: %s", e)
             return []
     
-    def _parse_prs(self, content: str) -> List[Dict[str, Any]]:
-        """Parse pull requests from GitHub API response"""
+    def _parse_issues(self, data: List[Dict[str, Any]]) -> List[Issue]:
+        """Parse issues from decoded GitHub API response"""
         try:
-            if not content:
-                return []
-            data = json.loads(content)
-            if isinstance(data, list):
-                return [
-                    {
-                        "number": pr.get("number"),
-                        "title": pr.get("title"),
-                        "state": pr.get("state"),
-                        "user": pr.get("user", {}).get("login") if pr.get("user") else None,
-                        "created_at": pr.get("created_at"),
-                        "updated_at": pr.get("updated_at"),
-                        "merged_at": pr.get("merged_at"),
-                        "closed_at": pr.get("closed_at"),
-                        "labels": [label.get("name") for label in pr.get("labels", []) if label and label.get("name")],
-                        "draft": pr.get("draft", False),
-                        "url": pr.get("html_url"),
-                        "body": pr.get("body", "")[:500] if pr.get("body") else "",
-                        "assignees": [a.get("login") for a in pr.get("assignees", []) if a and a.get("login")],
-                        "requested_reviewers": [r.get("login") for r in pr.get("requested_reviewers", []) if r and r.get("login")],
-                        "head": pr.get("head", {}).get("ref") if pr.get("head") else None,
-                        "base": pr.get("base", {}).get("ref") if pr.get("base") else None
-                    }
-                    for pr in data
-                    if pr
-                ]
+            return [
+                Issue(
+                    number=issue.get("number"),
+                    title=issue.get("title"),
+                    state=_intern(issue.get("state")),
+                    labels=[_intern(label.get("name")) for label in issue.get("labels", []) if label and label.get("name")],
+                    created_at=issue.get("created_at"),
+                    updated_at=issue.get("updated_at"),
+                    user=_intern(issue.get("user", {}).get("login")) if issue.get("user") else None,
+                    assignees=[_intern(a.get("login")) for a in issue.get("assignees", []) if a and a.get("login")],
+                    comments=issue.get("comments", 0),
+                    url=issue.get("html_url"),
+                    milestone=_intern(issue.get("milestone", {}).get("title")) if issue.get("milestone") else None,
+                    closed_at=issue.get("closed_at")
+                )
+                for issue in data
+                if issue and not issue.get("pull_request")  # Filter out PRs from issues list
+            ]
+        except Exception as e:
+            log.warning("  ⚠️  Error parsing issues: %s", e)
             return []
+    
+    def _parse_prs(self, data: List[Dict[str, Any]]) -> List[PullRequest]:
+        """Parse pull requests from decoded GitHub API response"""
+        try:
+            return [
+                PullRequest(
+                    number=pr.get("number"),
+                    title=pr.get("title"),
+                    state=_intern(pr.get("state")),
+                    user=_intern(pr.get("user", {}).get("login")) if pr.get("user") else None,
+                    created_at=pr.get("created_at"),
+                    updated_at=pr.get("updated_at"),
+                    merged_at=pr.get("merged_at"),
+                    closed_at=pr.get("closed_at"),
+                    labels=[_intern(label.get("name")) for label in pr.get("labels", []) if label and label.get("name")],
+                    draft=pr.get("draft", False),
+                    url=pr.get("html_url"),
+                    assignees=[_intern(a.get("login")) for a in pr.get("assignees", []) if a and a.get("login")],
+                    requested_reviewers=[_intern(r.get("login")) for r in pr.get("requested_reviewers", []) if r and r.get("login")],
+                    head=pr.get("head", {}).get("ref") if pr.get("head") else None,
+                    base=_intern(pr.get("base", {}).get("ref")) if pr.get("base") else None
+                )
+                for pr in data
+                if pr
+            ]
         except Exception as e:
-            print(f"  ⚠️  Error parsing PRs: {e}")
+            log.warning("  ⚠️  Error parsing PRs: %s", e)
             return []
     
-    async def _categorize_issues(
-        self, 
-        open_issues: List[Dict], 
-        closed_issues: List[Dict]
-    ) -> Dict[str, List[Dict]]:
-        """Categorize issues into bugs, features, enhancements, etc."""
+    def _parse_issue_nodes(self, nodes: List[Dict[str, Any]]) -> List[Issue]:
+        """Parse issues from GraphQL nodes"""
+        return [
+            Issue(
+                number=node.get("number"),
+                title=node.get("title"),
+                state=_intern((node.get("state") or "").lower()),
+                labels=[_intern(l["name"]) for l in (node.get("labels") or {}).get("nodes", []) if l and l.get("name")],
+                created_at=node.get("createdAt"),
+                updated_at=node.get("updatedAt"),
+                user=_intern((node.get("author") or {}).get("login")),
+                assignees=[_intern(a["login"]) for a in (node.get("assignees") or {}).get("nodes", []) if a and a.get("login")],
+                comments=(node.get("comments") or {}).get("totalCount", 0),
+                url=node.get("url"),
+                milestone=_intern((node.get("milestone") or {}).get("title")),
+                closed_at=node.get("closedAt")
+            )
+            for node in nodes
+            if node
+        ]
+    
+    def _parse_pr_nodes(self, nodes: List[Dict[str, Any]]) -> List[PullRequest]:
+        """Parse pull requests from GraphQL nodes"""
+        return [
+            PullRequest(
+                number=node.get("number"),
+                title=node.get("title"),
+                state=_intern((node.get("state") or "").lower()),
+                user=_intern((node.get("author") or {}).get("login")),
+                created_at=node.get("createdAt"),
+                updated_at=node.get("updatedAt"),
+                merged_at=node.get("mergedAt"),
+                closed_at=node.get("closedAt"),
+                labels=[_intern(l["name"]) for l in (node.get("labels") or {}).get("nodes", []) if l and l.get("name")],
+                draft=node.get("isDraft", False),
+                url=node.get("url"),
+                assignees=[_intern(a["login"]) for a in (node.get("assignees") or {}).get("nodes", []) if a and a.get("login")],
+                requested_reviewers=[
+                    _intern(r["requestedReviewer"]["login"])
+                    for r in (node.get("reviewRequests") or {}).get("nodes", [])
+                    if r and (r.get("requestedReviewer") or {}).get("login")
+                ],
+                head=node.get("headRefName"),
+                base=_intern(node.get("baseRefName"))
+            )
+            for node in nodes
+            if node
+        ]
+    
+    async def _llm_analyze_all(
+        self,
+        open_issues: List[Issue],
+        closed_issues: List[Issue],
+        prs: List[PullRequest]
+    ) -> Dict[str, Any]:
+        """
+        Categorize issues, extract metadata and identify patterns with a single LLM call
+        Returns {"categorization", "metadata", "patterns"}; each section falls back
+        to a label/count based result if missing from the reply
+        Not called by analyze(), whose output is built from labels and counts only
+        """
+        all_issues = open_issues + closed_issues
+        sample = (open_issues + closed_issues[:20])[:PROMPT_ISSUE_LIMIT]  # Limit for LLM context
         
-        all_issues = open_issues + closed_issues[:20]  # Limit for LLM context
+        # Get label distribution
+        label_counts = Counter()
+        for issue in all_issues:
+            label_counts.update(issue.labels)
+        
+        # Get top contributors
+        contributors = Counter(
+            item.user for item in all_issues + prs if item.user
+        )
+        top_contributors = contributors.most_common(15)
         
-        prompt = f"""Categorize these GitHub issues into: bugs, features, enhancements, documentation, questions, other.
+        prompt = f"""Analyze these GitHub issues and pull requests.
+
+Issues (n=number, t=title, l=labels, u=author, a=assignees):
+{compact_json([{"n": i.number, "t": i.title, "l": i.labels, "u": i.user, "a": i.assignees} for i in sample])}
+
+Pull Requests (sample; n=number, t=title, l=labels, u=author, a=assignees):
+{compact_json([{"n": pr.number, "t": pr.title, "l": pr.labels, "u": pr.user, "a": pr.assignees} for pr in prs[:15]])}
+
+Label Distribution:
+{compact_json(label_counts)}
 
-Issues:
-{json.dumps(all_issues, indent=2)[:4000]}
+Top Contributors:
+{compact_json(dict(top_contributors))}
+
+1. Categorize the issues into: bugs, features, enhancements, documentation, questions, other.
+2. Extract metadata: code owners, contributors, affected services, technologies, themes.
+3. Identify patterns across the categorized issues and metadata.
 
 Return JSON:
 {{
-  "bugs": [{{"number": 123, "title": "...", "priority": "high|medium|low"}}],
-  "features": [{{"number": 124, "title": "...", "status": "proposed|in-progress"}}],
-  "enhancements": [{{"number": 125, "title": "..."}}],
-  "documentation": [{{"number": 126, "title": "..."}}],
-  "questions": [{{"number": 127, "title": "..."}}],
-  "other": [{{"number": 128, "title": "..."}}]
+  "categorization": {{
+    "bugs": [{{"number": 123, "title": "...", "priority": "high|medium|low"}}],
+    "features": [{{"number": 124, "title": "...", "status": "proposed|in-progress"}}],
+    "enhancements": [{{"number": 125, "title": "..."}}],
+    "documentation": [{{"number": 126, "title": "..."}}],
+    "questions": [{{"number": 127, "title": "..."}}],
+    "other": [{{"number": 128, "title": "..."}}]
+  }},
+  "metadata": {{
+    "code_owners": ["username1", "username2"],
+    "active_contributors": ["user1", "user2", "user3"],
+    "affected_services": ["Service1", "Service2"],
+    "common_technologies": ["tech1", "tech2"],
+    "issue_labels": {{"label1": count, "label2": count}},
+    "common_issue_themes": ["theme1", "theme2"]
+  }},
+  "patterns": {{
+    "common_bug_areas": ["area1", "area2"],
+    "frequent_feature_requests": ["feature type 1", "feature type 2"],
+    "pain_points": ["pain point 1", "pain point 2"],
+    "improvement_opportunities": ["opportunity 1", "opportunity 2"]
+  }}
 }}
 """
         
-        response = await self.llm.ainvoke([
-            SystemMessage(content="You are an issue triage expert. Return only valid JSON."),
+        result = await cached_invoke(self.llm, [
+            SystemMessage(content="You are an issue triage and analysis expert. Return only valid JSON."),
             HumanMessage(content=prompt)
         ])
+        if not isinstance(result, dict):
+            result = {}
         
-        try:
-            return json.loads(response.content.strip().replace("```json", "").replace("```", ""))
-        except:
+        return {
             # Fallback: use labels
-            return self._categorize_by_labels(all_issues)
+            "categorization": result.get("categorization") or self._categorize_by_labels(sample),
+            "metadata": result.get("metadata") or {
+                "code_owners": list(set([i.user for i in all_issues if i.user][:10])),
+                "active_contributors": [user for user, _ in top_contributors],
+                "affected_services": [],
+                "common_technologies": [],
+                "issue_labels": dict(label_counts),
+                "common_issue_themes": []
+            },
+            "patterns": result.get("patterns") or {
+                "common_bug_areas": [],
+                "frequent_feature_requests": [],
+                "pain_points": [],
+                "improvement_opportunities": []
+            }
+        }
     
-    def _categorize_by_labels(self, issues: List[Dict]) -> Dict[str, List[Dict]]:
+    def _categorize_by_labels(self, issues: List[Issue]) -> Dict[str, List[Dict]]:
         """Fallback categorization using labels"""
         categories = {
             "bugs": [],
@@ -211,303 +514,180 @@ Return JSON:
         }
         
         for issue in issues:
-            labels = [l.lower() for l in issue.get("labels", [])]
+            labels = [l.lower() for l in issue.labels]
             if any(l in labels for l in ["bug", "defect", "error"]):
-                categories["bugs"].append(issue)
+                categories["bugs"].append(asdict(issue))
             elif any(l in labels for l in ["feature", "enhancement"]):
-                categories["features"].append(issue)
+                categories["features"].append(asdict(issue))
             elif "documentation" in labels or "docs" in labels:
-                categories["documentation"].append(issue)
+                categories["documentation"].append(asdict(issue))
             elif "question" in labels:
-                categories["questions"].append(issue)
+                categories["questions"].append(asdict(issue))
             else:
-                categories["other"].append(issue)
+                categories["other"].append(asdict(issue))
         
         return categories
     
-    async def _extract_metadata(
-        self,
-        all_issues: List[Dict],
-        prs: List[Dict]
-    ) -> Dict[str, Any]:
-        """Extract metadata: code owners, tech stack, affected services"""
-        
-        # Get label distribution
-        label_counts = {}
-        for issue in all_issues:
-            for label in issue.get("labels", []):
-                label_counts[label] = label_counts.get(label, 0) + 1
-        
-        # Get top contributors
-        contributors = {}
-        for issue in all_issues:
-            user = issue.get("user")
-            if user:
-                contributors[user] = contributors.get(user, 0) + 1
-        for pr in prs:
-            user = pr.get("user")
-            if user:
-                contributors[user] = contributors.get(user, 0) + 1
-        
-        top_contributors = sorted(contributors.items(), key=lambda x: x[1], reverse=True)[:15]
-        
-        prompt = f"""Extract metadata from these issues and PRs:
-
-Issues (sample):
-{json.dumps(all_issues[:20], indent=2)}
-
-Pull Requests (sample):
-{json.dumps(prs[:15], indent=2)}
-
-Label Distribution:
-{json.dumps(label_counts, indent=2)}
-
-Top Contributors:
-{json.dumps(dict(top_contributors), indent=2)}
-
-Extract and return JSON:
-{{
-  "code_owners": ["username1", "username2"],
-  "active_contributors": ["user1", "user2", "user3"],
-  "affected_services": ["Service1", "Service2"],
-  "common_technologies": ["tech1", "tech2"],
-  "issue_labels": {{"label1": count, "label2": count}},
-  "common_issue_themes": ["theme1", "theme2"]
-}}
-"""
-        
-        response = await self.llm.ainvoke([
-            SystemMessage(content="You are a metadata extraction expert. Return only valid JSON."),
-            HumanMessage(content=prompt)
-        ])
-        
-        try:
-            return json.loads(response.content.strip().replace("```json", "").replace("```", ""))
-        except:
-            return {
-                "code_owners": list(set([i.get("user") for i in all_issues if i.get("user")][:10])),
-                "active_contributors": [user for user, _ in top_contributors],
-                "affected_services": [],
-                "common_technologies": [],
-                "issue_labels": label_counts,
-                "common_issue_themes": []
-            }
-    
-    def _extract_direct_metadata(
+    def _aggregate(
         self,
-        all_issues: List[Dict],
-        prs: List[Dict]
+        all_issues: List[Issue],
+        prs: List[PullRequest]
     ) -> Dict[str, Any]:
-        """Extract metadata directly from issues without LLM"""
+        """
+        Build all issue/PR aggregates in a single pass over each list
+        Shared by metadata, statistics and insights extraction
+        """
+        label_counts = Counter()
+        issue_authors = Counter()
+        pr_authors = Counter()
+        assignee_counts = Counter()
+        milestone_counts = Counter()
+        type_counts = {"bugs": 0, "features": 0, "documentation": 0}
+        label_buckets = {}
+        discussed = []
+        unassigned_open = 0
         
-        # Label distribution
-        label_counts = {}
         for issue in all_issues:
-            for label in issue.get("labels", []):
-                label_counts[label] = label_counts.get(label, 0) + 1
+            labels = issue.labels
+            label_counts.update(labels)
+            
+            if issue.user:
+                issue_authors[issue.user] += 1
+            
+            assignee_counts.update(issue.assignees)
+            
+            if issue.milestone:
+                milestone_counts[issue.milestone] += 1
+            
+            # Issue types by label (each distinct label is classified once)
+            issue_types = set()
+            for label in labels:
+                buckets = label_buckets.get(label)
+                if buckets is None:
+                    lowered = label.lower()
+                    buckets = label_buckets[label] = frozenset(
+                        bucket for keyword, bucket in LABEL_KEYWORDS.items() if keyword in lowered
+                    )
+                issue_types.update(buckets)
+            for bucket in issue_types:
+                type_counts[bucket] += 1
+            
+            if issue.comments > 0:
+                discussed.append(issue)
+            
+            if issue.state == "open" and not issue.assignees:
+                unassigned_open += 1
         
-        # User activity
-        issue_authors = {}
-        pr_authors = {}
-        assignees_list = []
-        
-        for issue in all_issues:
-            user = issue.get("user")
-            if user:
-                issue_authors[user] = issue_authors.get(user, 0) + 1
-            assignees_list.extend(issue.get("assignees", []))
+        pr_stats = {
+            "total": len(prs),
+            "open": 0,
+            "merged": 0,
+            "draft": 0,
+            "with_assignees": 0
+        }
+        awaiting_review = 0
         
         for pr in prs:
-            user = pr.get("user")
-            if user:
-                pr_authors[user] = pr_authors.get(user, 0) + 1
-            assignees_list.extend(pr.get("assignees", []))
+            if pr.user:
+                pr_authors[pr.user] += 1
+            
+            assignee_counts.update(pr.assignees)
+            
+            if pr.state == "open":
+                pr_stats["open"] += 1
+                if not pr.requested_reviewers:
+                    awaiting_review += 1
+            if pr.merged_at:
+                pr_stats["merged"] += 1
+            if pr.draft:
+                pr_stats["draft"] += 1
+            if pr.assignees:
+                pr_stats["with_assignees"] += 1
         
-        # Milestone tracking
-        milestones = {}
-        for issue in all_issues:
-            milestone = issue.get("milestone")
-            if milestone:
-                milestones[milestone] = milestones.get(milestone, 0) + 1
-        
-        # Issue types by label
-        bugs = [i for i in all_issues if any('bug' in l.lower() for l in i.get("labels", []))]
-        features = [i for i in all_issues if any('feature' in l.lower() or 'enhancement' in l.lower() for l in i.get("labels", []))]
-        docs = [i for i in all_issues if any('doc' in l.lower() for l in i.get("labels", []))]
+        # Issues with most comments
+        most_discussed = heapq.nlargest(10, discussed, key=attrgetter("comments"))
         
         return {
-            "labels": dict(sorted(label_counts.items(), key=lambda x: x[1], reverse=True)[:20]),
-            "top_issue_creators": dict(sorted(issue_authors.items(), key=lambda x: x[1], reverse=True)[:10]),
-            "top_pr_creators": dict(sorted(pr_authors.items(), key=lambda x: x[1], reverse=True)[:10]),
-            "top_assignees": dict(sorted(
-                {a: assignees_list.count(a) for a in set(assignees_list)}.items(),
-                key=lambda x: x[1], reverse=True
-            )[:10]),
-            "milestones": milestones,
-            "issue_counts_by_type": {
-                "bugs": len(bugs),
-                "features": len(features),
-                "documentation": len(docs)
-            }
+            "label_counts": label_counts,
+            "issue_authors": issue_authors,
+            "pr_authors": pr_authors,
+            "assignee_counts": assignee_counts,
+            "milestone_counts": dict(milestone_counts),
+            "type_counts": type_counts,
+            "most_discussed": most_discussed,
+            "unassigned_open_count": unassigned_open,
+            "pr_stats": pr_stats,
+            "awaiting_review_count": awaiting_review
+        }
+    
+    def _extract_direct_metadata(self, aggregates: Dict[str, Any]) -> Dict[str, Any]:
+        """Extract metadata directly from issue aggregates without LLM"""
+        return {
+            "labels": dict(aggregates["label_counts"].most_common(20)),
+            "top_issue_creators": dict(aggregates["issue_authors"].most_common(10)),
+            "top_pr_creators": dict(aggregates["pr_authors"].most_common(10)),
+            "top_assignees": dict(aggregates["assignee_counts"].most_common(10)),
+            "milestones": aggregates["milestone_counts"],
+            "issue_counts_by_type": dict(aggregates["type_counts"])
         }
     
     def _extract_insights(
         self,
-        all_issues: List[Dict],
-        prs: List[Dict],
-        metadata: Dict[str, Any]
+        all_issues: List[Issue],
+        aggregates: Dict[str, Any],
+        statistics: Dict[str, Any]
     ) -> Dict[str, Any]:
-        """Extract insights from the data"""
-        
-        # Get issues with most comments
-        highly_discussed = sorted(
-            [i for i in all_issues if i.get("comments", 0) > 5],
-            key=lambda x: x.get("comments", 0),
-            reverse=True
-        )[:10]
+        """Extract insights from the data, reusing the already computed statistics"""
         
         # Recently updated issues
-        recently_active = sorted(
-            all_issues,
-            key=lambda x: x.get("updated_at", ""),
-            reverse=True
-        )[:10]
-        
-        # Open issues without assignees
-        unassigned_open = [
-            i for i in all_issues 
-            if i.get("state") == "open" and not i.get("assignees")
-        ]
-        
-        # Draft PRs
-        draft_prs = [pr for pr in prs if pr.get("draft")]
-        
-        # PRs awaiting review
-        awaiting_review = [
-            pr for pr in prs 
-            if pr.get("state") == "open" and not pr.get("requested_reviewers")
-        ]
+        recently_active = heapq.nlargest(10, all_issues, key=lambda x: x.updated_at or "")
         
         return {
             "highly_discussed_issues": [
-                {"number": i.get("number"), "title": i.get("title"), "comments": i.get("comments")}
-                for i in highly_discussed
+                i for i in statistics["most_discussed_issues"] if i["comments"] > 5
             ],
             "recently_active_issues": [
-                {"number": i.get("number"), "title": i.get("title"), "updated_at": i.get("updated_at")}
+                {"number": i.number, "title": i.title, "updated_at": i.updated_at}
                 for i in recently_active
             ],
-            "unassigned_open_issues_count": len(unassigned_open),
-            "draft_prs_count": len(draft_prs),
-            "prs_awaiting_review_count": len(awaiting_review),
-            "most_used_labels": list(metadata.get("labels", {}).keys())[:10]
+            "unassigned_open_issues_count": aggregates["unassigned_open_count"],
+            "draft_prs_count": statistics["pr_statistics"]["draft"],
+            "prs_awaiting_review_count": aggregates["awaiting_review_count"],
+            "most_used_labels": list(statistics["label_distribution"])[:10]
         }
     
-    def _calculate_statistics(
-        self,
-        all_issues: List[Dict],
-        prs: List[Dict]
-    ) -> Dict[str, Any]:
-        """Calculate statistics from issues and PRs"""
-        
-        # Issues with most comments
-        top_discussed = sorted(
-            [i for i in all_issues if i.get("comments", 0) > 0],
-            key=lambda x: x.get("comments", 0),
-            reverse=True
-        )[:10]
-        
-        # Label distribution
-        label_counts = {}
-        for issue in all_issues:
-            for label in issue.get("labels", []):
-                label_counts[label] = label_counts.get(label, 0) + 1
-        
-        # Milestone tracking
-        milestone_counts = {}
-        for issue in all_issues:
-            milestone = issue.get("milestone")
-            if milestone:
-                milestone_counts[milestone] = milestone_counts.get(milestone, 0) + 1
-        
-        # PR statistics
-        pr_stats = {
-            "total": len(prs),
-            "open": len([pr for pr in prs if pr.get("state") == "open"]),
-            "merged": len([pr for pr in prs if pr.get("merged_at")]),
-            "draft": len([pr for pr in prs if pr.get("draft")]),
-            "with_assignees": len([pr for pr in prs if pr.get("assignees")])
-        }
-        
+    def _calculate_statistics(self, aggregates: Dict[str, Any]) -> Dict[str, Any]:
+        """Calculate statistics from issue and PR aggregates"""
         return {
             "most_discussed_issues": [
-                {"number": i.get("number"), "title": i.get("title"), "comments": i.get("comments")}
-                for i in top_discussed
+                {"number": i.number, "title": i.title, "comments": i.comments}
+                for i in aggregates["most_discussed"]
             ],
-            "label_distribution": dict(sorted(label_counts.items(), key=lambda x: x[1], reverse=True)),
-            "milestone_distribution": milestone_counts,
-            "pr_statistics": pr_stats
+            "label_distribution": dict(aggregates["label_counts"].most_common()),
+            "milestone_distribution": aggregates["milestone_counts"],
+            "pr_statistics": dict(aggregates["pr_stats"])
         }
     
-    async def _identify_patterns(
-        self,
-        categorized: Dict[str, List],
-        metadata: Dict[str, Any]
-    ) -> Dict[str, Any]:
-        """Identify patterns in issues"""
-        
-        prompt = f"""Analyze these categorized issues to identify patterns:
-
-Categorized Issues:
-{json.dumps(categorized, indent=2)[:3000]}
-
-Metadata:
-{json.dumps(metadata, indent=2)}
-
-Identify patterns and return JSON:
-{{
-  "common_bug_areas": ["area1", "area2"],
-  "frequent_feature_requests": ["feature type 1", "feature type 2"],
-  "pain_points": ["pain point 1", "pain point 2"],
-  "improvement_opportunities": ["opportunity 1", "opportunity 2"]
-}}
-"""
-        
-        response = await self.llm.ainvoke([
-            SystemMessage(content="You are a pattern analysis expert. Return only valid JSON."),
-            HumanMessage(content=prompt)
-        ])
-        
-        try:
-            return json.loads(response.content.strip().replace("```json", "").replace("```", ""))
-        except:
-            return {
-                "common_bug_areas": [],
-                "frequent_feature_requests": [],
-                "pain_points": [],
-                "improvement_opportunities": []
-            }
-    
     def _get_recent_activity(
         self,
-        recent_issues: List[Dict],
-        recent_prs: List[Dict]
+        recent_issues: List[Issue],
+        recent_prs: List[PullRequest]
     ) -> Dict[str, List]:
         """Get recent activity summary"""
         return {
             "recent_issues": [
                 {
-                    "number": issue.get("number"),
-                    "title": issue.get("title"),
-                    "created_at": issue.get("created_at")
+                    "number": issue.number,
+                    "title": issue.title,
+                    "created_at": issue.created_at
                 }
                 for issue in recent_issues
             ],
             "recent_prs": [
                 {
-                    "number": pr.get("number"),
-                    "title": pr.get("title"),
-                    "created_at": pr.get("created_at")
+                    "number": pr.number,
+                    "title": pr.title,
+                    "created_at": pr.created_at
                 }
                 for pr in recent_prs
             ]
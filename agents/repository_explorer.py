@@ -2,10 +2,122 @@
 Repository Explorer Agent
 Dynamically discovers repository structure and services using GitHub MCP
 """
-import json
-from typing import Dict, List, Any, Optional
+import re
+import asyncio
+import hashlib
+import logging
+from functools import lru_cache
+from typing import Dict, List, Any, Optional, Tuple
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_openai import AzureChatOpenAI
+import tiktoken
+
+from tools.llm_cache import cached_invoke, compact_json, parse_json
+
+log = logging.getLogger(__name__)
+
+# Max services analyzed at the same time
+SERVICE_CONCURRENCY = 8
+
+# Prompt input budgets, in tokens
+README_TOKENS_SERVICES = 800
+README_TOKENS_ARCHITECTURE = 1000
+SERVICE_FILE_TOKENS = 500  # each of .csproj and Program.cs
+
+PROMPT_ENCODING = "o200k_base"  # gpt-4o family tokenizer
+CHARS_PER_TOKEN = 4  # rough ratio used if the tokenizer can't be loaded
+
+# Directory names that look like services, for when the LLM can't identify them
+_SVC_KW = re.compile(r"api|service|app|web|client", re.I)
+
+# Stands in for the service name when comparing service files
+SERVICE_NAME_PLACEHOLDER = "{service}"
+
+# Static instructions go in the system message and only the repository data
+# in the human message, so the shared prompt prefix is identical across calls
+# and can be served from the provider's prompt cache
+SYSTEM_IDENTIFY_SERVICES = """You are a repository analysis expert. Return only valid JSON.
+
+You will be given a repository README and its directories and project files.
+Identify ALL services/applications in the repository.
+Look for:
+- API services (e.g., Catalog.API, Basket.API)
+- Web applications (e.g., WebApp, ClientApp)
+- Background services
+- Infrastructure/shared libraries (e.g., EventBus, ServiceDefaults)
+
+Return ONLY a JSON array of service names (directory/folder names):
+["Service1", "Service2", "Service3"]
+"""
+
+SYSTEM_ANALYZE_SERVICE = """You are a code analysis expert. Return only valid JSON.
+
+You will be given a service name, its project file (.csproj) and its Program.cs.
+Analyze the service and return JSON with:
+{
+  "name": "service name",
+  "description": "what this service does (concrete, specific)",
+  "technologies": ["tech1", "tech2"],
+  "dependencies": ["dependency1", "dependency2"],
+  "type": "api|webapp|library|service",
+  "port": "port number if found or null"
+}
+"""
+
+SYSTEM_ANALYZE_ARCHITECTURE = """You are an architecture analysis expert. Return only valid JSON.
+
+You will be given a repository README and its analyzed services.
+Analyze the repository's architecture and return JSON with:
+{
+  "overview": "brief description of the repository",
+  "connections": [
+    {"from": "ServiceA", "to": "ServiceB", "method": "REST|gRPC|Events"}
+  ],
+  "patterns": {
+    "shared_technologies": ["tech1", "tech2"],
+    "communication_styles": ["REST", "Events"],
+    "architecture_pattern": "microservices|monolith|modular"
+  },
+  "tech_stack": ["primary technologies used"]
+}
+"""
+
+_TRAILING_SPACES_RE = re.compile(r"[ \t]+$", re.M)
+_INNER_SPACES_RE = re.compile(r"(?<=\S)[ \t]{2,}")  # leading indentation is kept
+_BLANK_LINES_RE = re.compile(r"\n{2,}")
+
+
+def _squeeze(text: str) -> str:
+    """Drop blank lines and extra spaces so prompt slices carry more content"""
+    text = _INNER_SPACES_RE.sub(" ", _TRAILING_SPACES_RE.sub("", text))
+    return _BLANK_LINES_RE.sub("\n", text).strip("\n")
+
+
+@lru_cache(maxsize=1)
+def _encoding() -> Optional[tiktoken.Encoding]:
+    """Load the tokenizer once; None if its data can't be fetched (e.g. offline)"""
+    try:
+        return tiktoken.get_encoding(PROMPT_ENCODING)
+    except Exception as e:
+        log.warning("  ⚠️  Tokenizer unavailable, truncating by characters: %s", e)
+        return None
+
+
+def _trim(text: str, max_tokens: int) -> str:
+    """Truncate text to at most max_tokens tokens"""
+    # A token is at least one character, so short text can't exceed the budget
+    if len(text) <= max_tokens:
+        return text
+    enc = _encoding()
+    if enc is None:
+        return text[:max_tokens * CHARS_PER_TOKEN]
+    ids = enc.encode(text, disallowed_special=())
+    return text if len(ids) <= max_tokens else enc.decode(ids[:max_tokens])
+
+
+def _path_lines(entries: List[Dict]) -> str:
+    """Render name/path entries as one `name|path` line each"""
+    return "\n".join(f"{e.get('name')}|{e.get('path')}" for e in entries)
 
 
 class RepositoryExplorerAgent:
@@ -16,6 +128,8 @@ class RepositoryExplorerAgent:
         self.github = github_tools
         self.owner = None
         self.repo = None
+        # Fingerprint of service files -> (service name, analysis task)
+        self._service_analyses: Dict[str, Tuple[str, asyncio.Future]] = {}
     
     def set_repository(self, owner: str, repo: str):
         """Set target repository"""
@@ -27,54 +141,60 @@ class RepositoryExplorerAgent:
         Explore repository structure dynamically
         Returns structured information about the repository
         """
-        print(f"\n🔍 Exploring Repository: {self.owner}/{self.repo}")
-        print("=" * 60)
+        log.info("\n🔍 Exploring Repository: %s/%s", self.owner, self.repo)
+        log.info("=" * 60)
+        
+        # Steps 1-3 are independent, so fetch them concurrently
+        log.info("\n📥 Steps 1-3: Fetching README, src/ and root listings, project files...")
+        readme, src_structure, root_listing, csproj_results = await asyncio.gather(
+            self.github.get_file_contents(self.owner, self.repo, "README.md"),
+            self.github.get_file_contents(self.owner, self.repo, "src"),
+            self.github.get_file_contents(self.owner, self.repo, ""),
+            self.github.search_code(self.owner, self.repo, "extension:csproj", per_page=30)
+        )
         
-        # Step 1: Get main README
-        print("\n📖 Step 1: Fetching README...")
-        readme = await self.github.get_file_contents(self.owner, self.repo, "README.md")
+        # Step 7: metadata probes run in the background while the LLM steps proceed
+        metadata_task = asyncio.ensure_future(
+            self._extract_repository_metadata(self.github, root_listing=root_listing)
+        )
         
+        # Step 1: README
         if not readme:
-            print("  ⚠️  No README found")
+            log.warning("  ⚠️  No README found")
             readme = "No README available"
         else:
-            print(f"  ✅ README fetched ({len(readme)} chars)")
-        
-        # Step 2: Explore src directory
-        print("\n📁 Step 2: Exploring src/ directory...")
-        src_structure = await self.github.get_file_contents(self.owner, self.repo, "src")
+            log.info("  ✅ README fetched (%d chars)", len(readme))
         
+        # Step 2: src directory
         if not src_structure:
-            print("  ⚠️  No src/ directory, trying root...")
-            src_structure = await self.github.get_file_contents(self.owner, self.repo, "")
+            log.warning("  ⚠️  No src/ directory, using root...")
+            src_structure = root_listing
         
         directories = self._parse_directory_structure(src_structure) if src_structure else []
-        print(f"  ✅ Found {len(directories)} directories")
-        
-        # Step 3: Search for project files to identify services
-        print("\n🔎 Step 3: Searching for project files...")
-        csproj_results = await self.github.search_code(
-            self.owner, self.repo, "extension:csproj", per_page=30
-        )
+        log.info("  ✅ Found %d directories", len(directories))
         
+        # Step 3: project files to identify services
         project_files = self._parse_search_results(csproj_results) if csproj_results else []
-        print(f"  ✅ Found {len(project_files)} project files")
+        log.info("  ✅ Found %d project files", len(project_files))
         
-        # Step 4: Identify services using LLM
-        print("\n🤖 Step 4: Analyzing with LLM to identify services...")
-        services = await self._identify_services(readme, directories, project_files)
-        
-        # Step 5: Get detailed info for each service
-        print(f"\n📊 Step 5: Fetching details for {len(services)} services...")
-        detailed_services = await self._get_service_details(services)
-        
-        # Step 6: Analyze connections and patterns
-        print("\n🔗 Step 6: Analyzing service connections...")
-        analysis = await self._analyze_architecture(readme, detailed_services)
-        
-        # Step 7: Extract additional repository metadata
-        print("\n📚 Step 7: Extracting repository metadata...")
-        repo_metadata = await self._extract_repository_metadata(self.github)
+        try:
+            # Step 4: Identify services using LLM
+            log.info("\n🤖 Step 4: Analyzing with LLM to identify services...")
+            services = await self._identify_services(readme, directories, project_files)
+            
+            # Step 5: Get detailed info for each service
+            log.info("\n📊 Step 5: Fetching details for %d services...", len(services))
+            detailed_services = await self._get_service_details(services)
+            
+            # Step 6: Analyze connections and patterns
+            log.info("\n🔗 Step 6: Analyzing service connections...")
+            analysis = await self._analyze_architecture(readme, detailed_services)
+        except BaseException:
+            # Don't leave the metadata probes running or their errors unretrieved
+            metadata_task.cancel()
+            await asyncio.gather(metadata_task, return_exceptions=True)
+            raise
+        repo_metadata = await metadata_task
         
         result = {
             "repository": {
@@ -90,37 +210,32 @@ class RepositoryExplorerAgent:
             "tech_stack": analysis.get("tech_stack", [])
         }
         
-        print("\n✅ Repository exploration complete!")
-        print(f"   Services: {len(detailed_services)}")
-        print(f"   Connections: {len(result['connections'])}")
+        log.info("\n✅ Repository exploration complete!")
+        log.info("   Services: %d", len(detailed_services))
+        log.info("   Connections: %d", len(result["connections"]))
         
         return result
     
     def _parse_directory_structure(self, content: str) -> List[Dict[str, str]]:
         """Parse directory listing from GitHub API response"""
-        try:
-            data = json.loads(content)
-            if isinstance(data, list):
-                return [
-                    {"name": item.get("name"), "path": item.get("path"), "type": item.get("type")}
-                    for item in data
-                    if item.get("type") == "dir"
-                ]
-            return []
-        except:
+        data = parse_json(content, [])
+        if not isinstance(data, list):
             return []
+        return [
+            {"name": item.get("name"), "path": item.get("path"), "type": item.get("type")}
+            for item in data
+            if item.get("type") == "dir"
+        ]
     
     def _parse_search_results(self, content: str) -> List[Dict[str, str]]:
         """Parse search results from GitHub"""
-        try:
-            data = json.loads(content)
-            items = data.get("items", [])
-            return [
-                {"name": item.get("name"), "path": item.get("path")}
-                for item in items
-            ]
-        except:
+        data = parse_json(content, {})
+        if not isinstance(data, dict):
             return []
+        return [
+            {"name": item.get("name"), "path": item.get("path")}
+            for item in data.get("items", [])
+        ]
     
     async def _identify_services(
         self, 
@@ -130,78 +245,68 @@ class RepositoryExplorerAgent:
     ) -> List[str]:
         """Use LLM to identify services from repository structure"""
         
-        prompt = f"""You are analyzing a GitHub repository to identify services/applications.
+        prompt = f"""README Content (truncated):
+{_trim(_squeeze(readme), README_TOKENS_SERVICES)}
 
-README Content (first 3000 chars):
-{readme[:3000]}
-
-Directories found:
-{json.dumps(directories[:20], indent=2)}
-
-Project files found:
-{json.dumps(project_files[:20], indent=2)}
-
-Based on this information, identify ALL services/applications in this repository.
-Look for:
-- API services (e.g., Catalog.API, Basket.API)
-- Web applications (e.g., WebApp, ClientApp)
-- Background services
-- Infrastructure/shared libraries (e.g., EventBus, ServiceDefaults)
+Directories found (name|path):
+{_path_lines(directories[:20])}
 
-Return ONLY a JSON array of service names (directory/folder names):
-["Service1", "Service2", "Service3"]
+Project files found (name|path):
+{_path_lines(project_files[:20])}
 """
         
-        response = await self.llm.ainvoke([
-            SystemMessage(content="You are a repository analysis expert. Return only valid JSON."),
+        services = await cached_invoke(self.llm, [
+            SystemMessage(content=SYSTEM_IDENTIFY_SERVICES),
             HumanMessage(content=prompt)
         ])
         
-        try:
-            services = json.loads(response.content.strip().replace("```json", "").replace("```", ""))
-            return services if isinstance(services, list) else []
-        except:
+        if services is None:
             # Fallback: extract from directories
-            return [d["name"] for d in directories if any(
-                keyword in d["name"].lower() 
-                for keyword in ["api", "service", "app", "web", "client"]
-            )]
+            return [d["name"] for d in directories if d.get("name") and _SVC_KW.search(d["name"])]
+        return services if isinstance(services, list) else []
     
     async def _get_service_details(self, services: List[str]) -> List[Dict[str, Any]]:
-        """Get detailed information for each identified service"""
-        detailed_services = []
+        """Get detailed information for each identified service, in parallel"""
+        # Fetch every service's project file and Program.cs in one batch
+        paths = {
+            service: (f"src/{service}/{service}.csproj", f"src/{service}/Program.cs")
+            for service in services
+        }
+        files = await self.github.batch_get_files(
+            self.owner, self.repo, [path for pair in paths.values() for path in pair]
+        )
         
-        for service in services:
-            print(f"   • Analyzing {service}...", end=" ")
-            
-            # Try to get project file (suppress 404 errors)
-            project_file_path = f"src/{service}/{service}.csproj"
-            project_content = await self.github.get_file_contents(
-                self.owner, self.repo, project_file_path, silent=True
+        sem = asyncio.Semaphore(SERVICE_CONCURRENCY)
+        # gather keeps results in the same order as services
+        details = await asyncio.gather(*[
+            self._get_one_service_details(
+                service,
+                files.get(paths[service][0]) or "",
+                files.get(paths[service][1]) or "",
+                sem
             )
-            
-            # Try Program.cs only if project file exists or is likely an executable
-            program_cs = ""
-            if project_content or any(x in service.lower() for x in [".api", "app", "processor", "client", "web"]):
-                program_cs_path = f"src/{service}/Program.cs"
-                program_cs = await self.github.get_file_contents(
-                    self.owner, self.repo, program_cs_path, silent=True
-                ) or ""
-            
-            # Show status
-            if project_content or program_cs:
-                print("✓")
+            for service in services
+        ])
+        
+        # Report status once all services are done so lines don't interleave
+        for service, (project_path, program_path) in paths.items():
+            if files.get(project_path) or files.get(program_path):
+                log.info("   • %s ✓", service)
             else:
-                print("⚠ (minimal metadata)")
-            
-            # Analyze service with LLM
-            service_info = await self._analyze_service(
-                service, project_content or "", program_cs
-            )
-            
-            detailed_services.append(service_info)
+                log.info("   • %s ⚠ (minimal metadata)", service)
         
-        return detailed_services
+        return details
+    
+    async def _get_one_service_details(
+        self,
+        service: str,
+        project_content: str,
+        program_cs: str,
+        sem: asyncio.Semaphore
+    ) -> Dict[str, Any]:
+        """Analyze one service from its already fetched project files"""
+        async with sem:
+            return await self._analyze_service(service, project_content, program_cs)
     
     async def _analyze_service(
         self, 
@@ -209,50 +314,112 @@ Return ONLY a JSON array of service names (directory/folder names):
         project_file: str, 
         program_cs: str
     ) -> Dict[str, Any]:
-        """Analyze individual service to extract metadata"""
+        """
+        Analyze individual service to extract metadata
+        Services whose files only differ by the service name (shared boilerplate)
+        reuse the analysis of the first such service instead of calling the LLM again
+        """
+        if not project_file and not program_cs:
+            # Nothing for the LLM to analyze
+            return self._minimal_service_info(service_name)
+        
+        key = self._service_fingerprint(service_name, project_file, program_cs)
+        shared = self._service_analyses.get(key)
+        if shared is None:
+            shared = asyncio.ensure_future(
+                self._analyze_service_llm(service_name, project_file, program_cs)
+            )
+            self._service_analyses[key] = (service_name, shared)
+            return await shared
+        
+        template_name, task = shared
+        result = await task
+        return self._rename_service_analysis(result, template_name, service_name)
+    
+    def _service_fingerprint(self, service_name: str, project_file: str, program_cs: str) -> str:
+        """Hash of the service files with the service name and whitespace normalized"""
+        normalized = []
+        for content in (project_file, program_cs):
+            content = content.replace(service_name, SERVICE_NAME_PLACEHOLDER)
+            normalized.append(" ".join(content.split()))
+        return hashlib.sha256("\0".join(normalized).encode()).hexdigest()
+    
+    def _rename_service_analysis(
+        self,
+        result: Dict[str, Any],
+        template_name: str,
+        service_name: str
+    ) -> Dict[str, Any]:
+        """
+        Copy a shared service analysis for another service
+        Only the name and whole-word mentions in the description are rewritten;
+        technologies and dependencies are kept as reported
+        """
+        renamed = {
+            key: list(value) if isinstance(value, list) else value
+            for key, value in result.items()
+        }
+        renamed["name"] = service_name
+        description = renamed.get("description")
+        if isinstance(description, str):
+            # Not part of a longer dotted name (e.g. Basket.API vs Basket.API.Client)
+            pattern = rf"(?<![\w.]){re.escape(template_name)}(?!\w|\.\w)"
+            renamed["description"] = re.sub(pattern, lambda _: service_name, description)
+        return renamed
+    
+    async def _analyze_service_llm(
+        self, 
+        service_name: str, 
+        project_file: str, 
+        program_cs: str
+    ) -> Dict[str, Any]:
+        """Ask the LLM to analyze one service"""
         
-        prompt = f"""Analyze this service and extract information:
-
-Service Name: {service_name}
+        prompt = f"""Service Name: {service_name}
 
 Project File (.csproj):
-{project_file[:2000] if project_file else "Not available"}
+{_trim(project_file, SERVICE_FILE_TOKENS) if project_file else "Not available"}
 
 Program.cs:
-{program_cs[:2000] if program_cs else "Not available"}
-
-Extract and return JSON with:
-{{
-  "name": "service name",
-  "description": "what this service does (concrete, specific)",
-  "technologies": ["tech1", "tech2"],
-  "dependencies": ["dependency1", "dependency2"],
-  "type": "api|webapp|library|service",
-  "port": "port number if found or null"
-}}
+{_trim(program_cs, SERVICE_FILE_TOKENS) if program_cs else "Not available"}
 """
         
-        response = await self.llm.ainvoke([
-            SystemMessage(content="You are a code analysis expert. Return only valid JSON."),
+        result = await cached_invoke(self.llm, [
+            SystemMessage(content=SYSTEM_ANALYZE_SERVICE),
             HumanMessage(content=prompt)
         ])
         
-        try:
-            return json.loads(response.content.strip().replace("```json", "").replace("```", ""))
-        except:
-            return {
-                "name": service_name,
-                "description": "Service information not available",
-                "technologies": [],
-                "dependencies": [],
-                "type": "unknown",
-                "port": None
-            }
+        if not isinstance(result, dict):
+            return self._minimal_service_info(service_name)
+        return result
     
-    async def _extract_repository_metadata(self, session) -> Dict[str, Any]:
-        """Extract repository metadata files and structure"""
+    def _minimal_service_info(self, service_name: str) -> Dict[str, Any]:
+        """Placeholder details for a service that could not be analyzed"""
+        return {
+            "name": service_name,
+            "description": "Service information not available",
+            "technologies": [],
+            "dependencies": [],
+            "type": "unknown",
+            "port": None
+        }
+    
+    async def _extract_repository_metadata(
+        self,
+        session,
+        root_listing: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Extract repository metadata files and structure
+        Top-level folders (docs, tests) are looked up in root_listing when given
+        """
         metadata = {}
         
+        root_names = None
+        root_data = parse_json(root_listing, None) if root_listing else None
+        if isinstance(root_data, list):
+            root_names = {(item.get("name") or "").lower() for item in root_data}
+        
         # Check for common metadata files
         metadata_files = {
             "license": ["LICENSE", "LICENSE.md", "LICENSE.txt"],
@@ -261,10 +428,36 @@ Extract and return JSON with:
             "security": ["SECURITY.md", ".github/SECURITY.md"],
             "changelog": ["CHANGELOG.md", "CHANGELOG", "HISTORY.md"]
         }
+        test_dirs = ["tests", "test", "Tests", "Test"]
         
+        # Probe every path in one concurrent batch
+        probes = [(key, path) for key, paths in metadata_files.items() for path in paths]
+        probes += [
+            ("ci_cd_workflows", ".github/workflows"),
+            ("dockerfile", "Dockerfile"),
+            ("docker_compose", "docker-compose.yml")
+        ]
+        if root_names is None:
+            probes.append(("documentation", "docs"))
+            probes += [("testing", test_dir) for test_dir in test_dirs]
+        
+        results = await asyncio.gather(
+            *[
+                self.github.get_file_contents(self.owner, self.repo, path, silent=True)
+                for _, path in probes
+            ],
+            return_exceptions=True
+        )
+        found = {}
+        for (key, path), content in zip(probes, results):
+            if isinstance(content, BaseException):
+                content = None
+            found[(key, path)] = content
+        
+        # First existing path wins, in probe order
         for key, paths in metadata_files.items():
             for path in paths:
-                content = await self.github.get_file_contents(self.owner, self.repo, path, silent=True)
+                content = found[(key, path)]
                 if content:
                     metadata[key] = {"exists": True, "path": path, "content_preview": content[:200]}
                     break
@@ -272,41 +465,28 @@ Extract and return JSON with:
                 metadata[key] = {"exists": False}
         
         # Check for GitHub Actions workflows
-        workflows_dir = await self.github.get_file_contents(self.owner, self.repo, ".github/workflows", silent=True)
-        if workflows_dir:
-            try:
-                workflows_data = json.loads(workflows_dir)
-                if isinstance(workflows_data, list):
-                    metadata["ci_cd_workflows"] = [
-                        {"name": w.get("name"), "path": w.get("path")}
-                        for w in workflows_data if w.get("type") == "file"
-                    ]
-            except:
-                metadata["ci_cd_workflows"] = []
-        else:
-            metadata["ci_cd_workflows"] = []
+        workflows_dir = found[("ci_cd_workflows", ".github/workflows")]
+        workflows_data = parse_json(workflows_dir, []) if workflows_dir else []
+        metadata["ci_cd_workflows"] = [
+            {"name": w.get("name"), "path": w.get("path")}
+            for w in workflows_data if w.get("type") == "file"
+        ] if isinstance(workflows_data, list) else []
         
         # Check for Docker support
-        dockerfile = await self.github.get_file_contents(self.owner, self.repo, "Dockerfile", silent=True)
-        docker_compose = await self.github.get_file_contents(self.owner, self.repo, "docker-compose.yml", silent=True)
         metadata["docker_support"] = {
-            "dockerfile": dockerfile is not None,
-            "docker_compose": docker_compose is not None
+            "dockerfile": found[("dockerfile", "Dockerfile")] is not None,
+            "docker_compose": found[("docker_compose", "docker-compose.yml")] is not None
         }
         
-        # Check for documentation
-        docs_dir = await self.github.get_file_contents(self.owner, self.repo, "docs", silent=True)
-        metadata["documentation"] = {"has_docs_folder": docs_dir is not None}
-        
-        # Check for tests
-        test_dirs = ["tests", "test", "Tests", "Test"]
-        test_found = False
-        for test_dir in test_dirs:
-            test_content = await self.github.get_file_contents(self.owner, self.repo, test_dir, silent=True)
-            if test_content:
-                test_found = True
-                break
-        metadata["testing"] = {"has_test_directory": test_found}
+        # Check for documentation and tests
+        if root_names is not None:
+            has_docs = "docs" in root_names
+            has_tests = bool(root_names & {"tests", "test"})
+        else:
+            has_docs = found[("documentation", "docs")] is not None
+            has_tests = any(found[("testing", test_dir)] for test_dir in test_dirs)
+        metadata["documentation"] = {"has_docs_folder": has_docs}
+        metadata["testing"] = {"has_test_directory": has_tests}
         
         return metadata
     
@@ -317,40 +497,23 @@ Extract and return JSON with:
     ) -> Dict[str, Any]:
         """Analyze overall architecture, connections, and patterns"""
         
-        prompt = f"""Analyze this repository's architecture:
-
-README:
-{readme[:4000]}
+        prompt = f"""README:
+{_trim(_squeeze(readme), README_TOKENS_ARCHITECTURE)}
 
 Services:
-{json.dumps(services, indent=2)}
-
-Provide JSON with:
-{{
-  "overview": "brief description of the repository",
-  "connections": [
-    {{"from": "ServiceA", "to": "ServiceB", "method": "REST|gRPC|Events"}}
-  ],
-  "patterns": {{
-    "shared_technologies": ["tech1", "tech2"],
-    "communication_styles": ["REST", "Events"],
-    "architecture_pattern": "microservices|monolith|modular"
-  }},
-  "tech_stack": ["primary technologies used"]
-}}
+{compact_json(services)}
 """
         
-        response = await self.llm.ainvoke([
-            SystemMessage(content="You are an architecture analysis expert. Return only valid JSON."),
+        result = await cached_invoke(self.llm, [
+            SystemMessage(content=SYSTEM_ANALYZE_ARCHITECTURE),
             HumanMessage(content=prompt)
         ])
         
-        try:
-            return json.loads(response.content.strip().replace("```json", "").replace("```", ""))
-        except:
+        if not isinstance(result, dict):
             return {
                 "overview": "Analysis not available",
                 "connections": [],
                 "patterns": {},
                 "tech_stack": []
             }
+        return result
@@ -3,10 +3,13 @@ GitHub Repository Analyzer - Main Application
 Uses LangGraph agents to analyze any GitHub repository
 """
 import os
-import json
 import asyncio
+import logging
+import sys
+from contextvars import ContextVar
 from datetime import datetime
-from typing import TypedDict, Annotated
+from typing import TypedDict, Annotated, Tuple
+import orjson
 from dotenv import load_dotenv
 
 from langchain_openai import AzureChatOpenAI
@@ -27,6 +30,10 @@ class AnalysisState(TypedDict):
     status: str  # workflow status
 
 
+# Agents for the analyze() call currently running the workflow
+_run_agents: ContextVar[Tuple[RepositoryExplorerAgent, IssuesAnalyzerAgent]] = ContextVar("run_agents")
+
+
 class GitHubAnalyzer:
     """Main analyzer coordinating agents with LangGraph"""
     
@@ -48,11 +55,77 @@ class GitHubAnalyzer:
             temperature=0.1
         )
         
+        # The workflow is the same for every run, so compile it once
+        self._app = self._build_app()
+        
         print(f"\n🚀 GitHub Repository Analyzer")
         print(f"=" * 60)
         print(f"Target: {self.owner}/{self.repo}")
         print(f"=" * 60)
     
+    def _build_app(self):
+        """Build and compile the LangGraph workflow (once per analyzer)"""
+        workflow = StateGraph(AnalysisState)
+        
+        # Add nodes to graph
+        workflow.add_node("explore_repo", self._explore_repository)
+        workflow.add_node("analyze_issues", self._analyze_issues)
+        workflow.add_node("combine", self._combine_results)
+        
+        # Define edges (workflow flow)
+        workflow.set_entry_point("explore_repo")
+        workflow.add_edge("explore_repo", "analyze_issues")
+        workflow.add_edge("analyze_issues", "combine")
+        workflow.add_edge("combine", END)
+        
+        return workflow.compile()
+    
+    async def _explore_repository(self, state: AnalysisState) -> AnalysisState:
+        """Node: Explore repository structure and services"""
+        print("\n" + "=" * 60)
+        print("NODE: Repository Explorer")
+        print("=" * 60)
+        
+        repo_explorer, _ = _run_agents.get()
+        result = await repo_explorer.explore()
+        state["repository_analysis"] = result
+        state["status"] = "repository_explored"
+        return state
+    
+    async def _analyze_issues(self, state: AnalysisState) -> AnalysisState:
+        """Node: Analyze issues and PRs"""
+        print("\n" + "=" * 60)
+        print("NODE: Issues Analyzer")
+        print("=" * 60)
+        
+        _, issues_analyzer = _run_agents.get()
+        result = await issues_analyzer.analyze()
+        state["issues_analysis"] = result
+        state["status"] = "issues_analyzed"
+        return state
+    
+    async def _combine_results(self, state: AnalysisState) -> AnalysisState:
+        """Node: Combine all analysis results"""
+        print("\n" + "=" * 60)
+        print("NODE: Combining Results")
+        print("=" * 60)
+        
+        final_output = {
+            "analysis_metadata": {
+                "analyzed_at": datetime.now().isoformat(),
+                "repository": state["repository"],
+                "analyzer_version": "1.0.0"
+            },
+            "repository": state["repository_analysis"],
+            "issues": state["issues_analysis"]
+        }
+        
+        state["final_output"] = final_output
+        state["status"] = "completed"
+        
+        print("✅ Results combined successfully")
+        return state
+    
     async def analyze(self):
         """Run the analysis workflow"""
         
@@ -65,68 +138,6 @@ class GitHubAnalyzer:
             issues_analyzer = IssuesAnalyzerAgent(self.llm, github_tools)
             issues_analyzer.set_repository(self.owner, self.repo)
             
-            # Create LangGraph workflow
-            workflow = StateGraph(AnalysisState)
-            
-            # Define nodes
-            async def explore_repository(state: AnalysisState) -> AnalysisState:
-                """Node: Explore repository structure and services"""
-                print("\n" + "=" * 60)
-                print("NODE: Repository Explorer")
-                print("=" * 60)
-                
-                result = await repo_explorer.explore()
-                state["repository_analysis"] = result
-                state["status"] = "repository_explored"
-                return state
-            
-            async def analyze_issues(state: AnalysisState) -> AnalysisState:
-                """Node: Analyze issues and PRs"""
-                print("\n" + "=" * 60)
-                print("NODE: Issues Analyzer")
-                print("=" * 60)
-                
-                result = await issues_analyzer.analyze()
-                state["issues_analysis"] = result
-                state["status"] = "issues_analyzed"
-                return state
-            
-            async def combine_results(state: AnalysisState) -> AnalysisState:
-                """Node: Combine all analysis results"""
-                print("\n" + "=" * 60)
-                print("NODE: Combining Results")
-                print("=" * 60)
-                
-                final_output = {
-                    "analysis_metadata": {
-                        "analyzed_at": datetime.now().isoformat(),
-                        "repository": state["repository"],
-                        "analyzer_version": "1.0.0"
-                    },
-                    "repository": state["repository_analysis"],
-                    "issues": state["issues_analysis"]
-                }
-                
-                state["final_output"] = final_output
-                state["status"] = "completed"
-                
-                print("✅ Results combined successfully")
-                return state
-            
-            # Add nodes to graph
-            workflow.add_node("explore_repo", explore_repository)
-            workflow.add_node("analyze_issues", analyze_issues)
-            workflow.add_node("combine", combine_results)
-            
-            # Define edges (workflow flow)
-            workflow.set_entry_point("explore_repo")
-            workflow.add_edge("explore_repo", "analyze_issues")
-            workflow.add_edge("analyze_issues", "combine")
-            workflow.add_edge("combine", END)
-            
-            # Compile the graph
-            app = workflow.compile()
-            
             # Initialize state
             initial_state: AnalysisState = {
                 "repository": {
@@ -144,23 +155,22 @@ class GitHubAnalyzer:
             print("STARTING LANGGRAPH WORKFLOW")
             print("=" * 60)
             
-            final_state = await app.ainvoke(initial_state)
+            # Nodes read this run's agents from the context, so the compiled
+            # graph can be shared by concurrent analyze() calls
+            token = _run_agents.set((repo_explorer, issues_analyzer))
+            try:
+                final_state = await self._app.ainvoke(initial_state)
+            finally:
+                _run_agents.reset(token)
             
             # Save output
-            self._save_output(final_state["final_output"])
+            await self._save_output(final_state["final_output"])
             
             return final_state["final_output"]
     
-    def _save_output(self, output: dict):
-        """Save analysis output to file"""
-        os.makedirs(self.output_dir, exist_ok=True)
-        
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{self.owner}_{self.repo}_{timestamp}.json"
-        filepath = os.path.join(self.output_dir, filename)
-        
-        with open(filepath, "w", encoding="utf-8") as f:
-            json.dump(output, f, indent=2, ensure_ascii=False)
+    async def _save_output(self, output: dict):
+        """Save analysis output to file without blocking the event loop"""
+        filepath = await asyncio.to_thread(self._save_output_sync, output)
         
         print(f"\n" + "=" * 60)
         print(f"✅ ANALYSIS COMPLETE")
@@ -170,10 +180,29 @@ class GitHubAnalyzer:
         print(f"🐛 Open issues: {output.get('issues', {}).get('summary', {}).get('total_open_issues', 0)}")
         print(f"🔗 Connections: {len(output.get('repository', {}).get('connections', []))}")
         print("=" * 60)
+    
+    def _save_output_sync(self, output: dict) -> str:
+        """Serialize and write the output file; returns its path"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = f"{self.owner}_{self.repo}_{timestamp}.json"
+        filepath = os.path.join(self.output_dir, filename)
+        
+        # orjson writes UTF-8 bytes directly (same as ensure_ascii=False)
+        with open(filepath, "wb") as f:
+            f.write(orjson.dumps(output, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        
+        return filepath
 
 
 async def main():
     """Main entry point"""
+    # Progress goes through logging; keep it on stdout alongside the summary prints.
+    # Only our own loggers run at INFO so library request logs (httpx) stay quiet
+    logging.basicConfig(format="%(message)s", stream=sys.stdout)
+    for name in ("agents", "tools"):
+        logging.getLogger(name).setLevel(logging.INFO)
     analyzer = GitHubAnalyzer()
     await analyzer.analyze()
 
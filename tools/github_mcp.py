@@ -3,17 +3,77 @@ GitHub MCP Tools Wrapper
 Provides clean interface to GitHub MCP server tools
 """
 import os
+import asyncio
+import base64
+import binascii
+import hashlib
+import logging
+import time
+from pathlib import Path
 from typing import Any, Dict, List, Optional
+import httpx
+import orjson
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
 
+log = logging.getLogger(__name__)
+
+# On-disk cache for GitHub responses (TTL overridable with GITHUB_CACHE_TTL)
+CACHE_DIR = Path.home() / ".cache" / "github-analyzer"
+DEFAULT_CACHE_TTL = 60 * 60  # seconds
+
+# The MCP server has no GraphQL tool, so GraphQL queries go to the API directly
+GITHUB_GRAPHQL_URL = "https://api.github.com/graphql"
+BATCH_FILES_CHUNK = 50  # object aliases per GraphQL request
+
+# Environment for the MCP server subprocess, snapshotted on first connect
+# (not at import, so variables loaded from .env by the caller are included)
+_BASE_ENV: Optional[Dict[str, str]] = None
+
+
+def _base_env() -> Dict[str, str]:
+    """Copy of os.environ taken the first time it is needed"""
+    global _BASE_ENV
+    if _BASE_ENV is None:
+        _BASE_ENV = dict(os.environ)
+    return _BASE_ENV
+
+
+def _file_text(envelope: Optional[str]) -> Optional[str]:
+    """
+    Decoded file text from a get_file_contents reply
+    The MCP server wraps file contents in a JSON object (sha, url, path, content...);
+    directories and unparseable replies give None
+    """
+    if not envelope:
+        return None
+    try:
+        data = orjson.loads(envelope)
+    except orjson.JSONDecodeError:
+        return None
+    if not isinstance(data, dict) or not isinstance(data.get("content"), str):
+        return None
+    content = data["content"]
+    if data.get("encoding") == "base64":
+        try:
+            content = base64.b64decode(content).decode("utf-8")
+        except (binascii.Error, UnicodeDecodeError):
+            return None
+    return content
+
 
 class GitHubMCPTools:
     """Wrapper for GitHub MCP server tools"""
     
-    def __init__(self, github_token: str):
+    def __init__(self, github_token: str, cache_ttl: Optional[int] = None):
         self.github_token = github_token
+        if cache_ttl is None:
+            cache_ttl = int(os.getenv("GITHUB_CACHE_TTL", DEFAULT_CACHE_TTL))
+        self.cache_ttl = cache_ttl  # 0 disables the cache
         self.session: Optional[ClientSession] = None
+        self.http: Optional[httpx.AsyncClient] = None
+        # (owner, repo, path, branch) -> file contents, None for missing paths
+        self._file_memo: Dict[tuple, Optional[str]] = {}
     
     async def __aenter__(self):
         """Context manager entry - connect to MCP server"""
@@ -24,10 +84,7 @@ class GitHubMCPTools:
         server_params = StdioServerParameters(
             command=npx_cmd,
             args=["-y", "@modelcontextprotocol/server-github"],
-            env={
-                "GITHUB_PERSONAL_ACCESS_TOKEN": self.github_token,
-                **os.environ
-            }
+            env=_base_env() | {"GITHUB_PERSONAL_ACCESS_TOKEN": self.github_token}
         )
         
         self.stdio_context = stdio_client(server_params)
@@ -37,15 +94,96 @@ class GitHubMCPTools:
         self.session = await self.session_context.__aenter__()
         await self.session.initialize()
         
+        self.http = httpx.AsyncClient(
+            timeout=30.0,
+            headers={"Authorization": f"Bearer {self.github_token}"}
+        )
+        
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Context manager exit - cleanup"""
+        if self.http:
+            await self.http.aclose()
         if self.session:
             await self.session_context.__aexit__(exc_type, exc_val, exc_tb)
         if hasattr(self, 'stdio_context'):
             await self.stdio_context.__aexit__(exc_type, exc_val, exc_tb)
     
+    def _cache_path(self, owner: str, repo: str, tool: str, *parts: Any) -> Path:
+        """Cache file for one tool call, keyed by its arguments"""
+        key = hashlib.blake2b("|".join(str(p) for p in parts).encode(), digest_size=16).hexdigest()
+        return CACHE_DIR / f"{owner}_{repo}" / f"{tool}_{key}.json"
+    
+    def _read_cache(self, path: Path) -> Optional[str]:
+        """Return cached body if it exists and is still fresh"""
+        if self.cache_ttl <= 0:
+            return None
+        try:
+            if time.time() - path.stat().st_mtime < self.cache_ttl:
+                return path.read_text(encoding="utf-8")
+        except OSError:
+            pass
+        return None
+    
+    def _write_cache(self, path: Path, body: str):
+        """Store a response body in the cache (nothing is written when caching is disabled)"""
+        if self.cache_ttl <= 0:
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(body, encoding="utf-8")
+        except OSError as e:
+            log.warning("  ⚠️  Could not write GitHub cache %s: %s", path, e)
+    
+    async def graphql(
+        self,
+        query: str,
+        variables: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Run a GitHub GraphQL query and return its data"""
+        try:
+            response = await self.http.post(
+                GITHUB_GRAPHQL_URL,
+                json={"query": query, "variables": variables or {}}
+            )
+            response.raise_for_status()
+            # Decode straight from the response bytes, skipping httpx's text decode
+            payload = orjson.loads(response.content)
+            if payload.get("errors"):
+                log.warning("  ⚠️  GraphQL errors: %s", payload["errors"])
+                return None
+            return payload.get("data")
+        except Exception as e:
+            log.warning("  ⚠️  Error running GraphQL query: %s", e)
+            return None
+    
+    async def graphql_cached(
+        self,
+        owner: str,
+        repo: str,
+        tool: str,
+        query: str,
+        variables: Dict[str, Any],
+        *key_parts: Any
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Run a GraphQL query whose data is cached on disk for cache_ttl seconds
+        key_parts identify the request within (owner, repo, tool), e.g. page cursors
+        """
+        cache_path = self._cache_path(owner, repo, tool, *key_parts)
+        cached = self._read_cache(cache_path)
+        if cached is not None:
+            try:
+                return orjson.loads(cached)
+            except orjson.JSONDecodeError:
+                pass
+        
+        data = await self.graphql(query, variables)
+        if data is not None:
+            self._write_cache(cache_path, orjson.dumps(data).decode())
+        return data
+    
     async def get_file_contents(
         self, 
         owner: str, 
@@ -54,7 +192,20 @@ class GitHubMCPTools:
         branch: Optional[str] = None,
         silent: bool = False
     ) -> Optional[str]:
-        """Get contents of a file or directory"""
+        """
+        Get contents of a file or directory
+        Memoized for the lifetime of this instance and cached on disk for cache_ttl seconds
+        """
+        memo_key = (owner, repo, path, branch)
+        if memo_key in self._file_memo:
+            return self._file_memo[memo_key]
+        
+        cache_path = self._cache_path(owner, repo, "contents", path, branch)
+        cached = self._read_cache(cache_path)
+        if cached is not None:
+            self._file_memo[memo_key] = cached
+            return cached
+        
         try:
             args = {"owner": owner, "repo": repo, "path": path}
             if branch:
@@ -65,15 +216,77 @@ class GitHubMCPTools:
             if result and hasattr(result, 'content'):
                 for item in result.content:
                     if hasattr(item, 'text'):
+                        if not getattr(result, 'isError', False):
+                            self._write_cache(cache_path, item.text)
+                            self._file_memo[memo_key] = item.text
                         return item.text
+            self._file_memo[memo_key] = None
             return None
         except Exception as e:
-            if not silent:
+            if "Not Found" in str(e):
+                self._file_memo[memo_key] = None
+            elif not silent:
                 # Only print errors for unexpected issues, not 404s
-                if "Not Found" not in str(e):
-                    print(f"Error getting {path}: {e}")
+                print(f"Error getting {path}: {e}")
             return None
     
+    async def batch_get_files(
+        self,
+        owner: str,
+        repo: str,
+        paths: List[str],
+        branch: Optional[str] = None
+    ) -> Dict[str, Optional[str]]:
+        """
+        Get the text of several files with one GraphQL request per BATCH_FILES_CHUNK paths
+        Missing and binary files map to None; falls back to get_file_contents per path,
+        unwrapping its JSON envelope so either path yields the raw file text
+        """
+        files: Dict[str, Optional[str]] = {}
+        pending = []
+        for path in dict.fromkeys(paths):
+            memo_key = (owner, repo, f"blob:{path}", branch)
+            if memo_key in self._file_memo:
+                files[path] = self._file_memo[memo_key]
+                continue
+            cached = self._read_cache(self._cache_path(owner, repo, "blob", path, branch))
+            if cached is not None:
+                files[path] = self._file_memo[memo_key] = cached
+                continue
+            pending.append(path)
+        
+        ref = branch or "HEAD"
+        for start in range(0, len(pending), BATCH_FILES_CHUNK):
+            chunk = pending[start:start + BATCH_FILES_CHUNK]
+            # Expressions are passed as variables so paths never need escaping
+            params = "".join(f", $e{i}: String!" for i in range(len(chunk)))
+            aliases = " ".join(
+                f"f{i}: object(expression: $e{i}) {{ ... on Blob {{ text }} }}"
+                for i in range(len(chunk))
+            )
+            query = f"query($owner: String!, $repo: String!{params}) {{ repository(owner: $owner, name: $repo) {{ {aliases} }} }}"
+            variables = {"owner": owner, "repo": repo}
+            variables.update({f"e{i}": f"{ref}:{path}" for i, path in enumerate(chunk)})
+            
+            data = await self.graphql(query, variables) if self.http else None
+            if data is None or not data.get("repository"):
+                envelopes = await asyncio.gather(*[
+                    self.get_file_contents(owner, repo, path, branch, silent=True)
+                    for path in chunk
+                ])
+                # Unwrap to the same raw text the GraphQL path returns
+                files.update(zip(chunk, map(_file_text, envelopes)))
+                continue
+            
+            repository = data["repository"]
+            for i, path in enumerate(chunk):
+                text = (repository.get(f"f{i}") or {}).get("text")
+                files[path] = self._file_memo[(owner, repo, f"blob:{path}", branch)] = text
+                if text is not None:
+                    self._write_cache(self._cache_path(owner, repo, "blob", path, branch), text)
+        
+        return {path: files.get(path) for path in paths}
+    
     async def list_issues(
         self,
         owner: str,
@@ -82,7 +295,12 @@ class GitHubMCPTools:
         per_page: int = 30,
         page: int = 1
     ) -> Optional[str]:
-        """List issues in repository"""
+        """List issues in repository (cached on disk for cache_ttl seconds)"""
+        cache_path = self._cache_path(owner, repo, "issues", state, per_page, page)
+        cached = self._read_cache(cache_path)
+        if cached is not None:
+            return cached
+        
         try:
             result = await self.session.call_tool(
                 "list_issues",
@@ -98,6 +316,8 @@ class GitHubMCPTools:
             if result and hasattr(result, 'content'):
                 for item in result.content:
                     if hasattr(item, 'text'):
+                        if not getattr(result, 'isError', False):
+                            self._write_cache(cache_path, item.text)
                         return item.text
             return None
         except Exception as e:
@@ -137,7 +357,12 @@ class GitHubMCPTools:
         query: str,
         per_page: int = 10
     ) -> Optional[str]:
-        """Search code in repository"""
+        """Search code in repository (cached on disk for cache_ttl seconds)"""
+        cache_path = self._cache_path(owner, repo, "search", query, per_page)
+        cached = self._read_cache(cache_path)
+        if cached is not None:
+            return cached
+        
         try:
             search_query = f"{query} repo:{owner}/{repo}"
             result = await self.session.call_tool(
@@ -151,6 +376,8 @@ class GitHubMCPTools:
             if result and hasattr(result, 'content'):
                 for item in result.content:
                     if hasattr(item, 'text'):
+                        if not getattr(result, 'isError', False):
+                            self._write_cache(cache_path, item.text)
                         return item.text
             return None
         except Exception as e:
@@ -162,9 +389,15 @@ class GitHubMCPTools:
         owner: str,
         repo: str,
         state: str = "open",
-        per_page: int = 30
+        per_page: int = 30,
+        page: int = 1
     ) -> Optional[str]:
-        """List pull requests"""
+        """List pull requests (cached on disk for cache_ttl seconds)"""
+        cache_path = self._cache_path(owner, repo, "pulls", state, per_page, page)
+        cached = self._read_cache(cache_path)
+        if cached is not None:
+            return cached
+        
         try:
             result = await self.session.call_tool(
                 "list_pull_requests",
@@ -172,13 +405,16 @@ class GitHubMCPTools:
                     "owner": owner,
                     "repo": repo,
                     "state": state,
-                    "per_page": per_page
+                    "per_page": per_page,
+                    "page": page
                 }
             )
             
             if result and hasattr(result, 'content'):
                 for item in result.content:
                     if hasattr(item, 'text'):
+                        if not getattr(result, 'isError', False):
+                            self._write_cache(cache_path, item.text)
                         return item.text
             return None
         except Exception as e:
@@ -0,0 +1,86 @@
+"""
+LLM Response Cache
+Exact-match disk cache for JSON replies from deterministic LLM prompts
+"""
+import os
+import re
+import hashlib
+import logging
+import time
+from pathlib import Path
+from typing import Any, List, Optional
+import orjson
+from langchain_core.messages import BaseMessage
+
+log = logging.getLogger(__name__)
+
+LLM_CACHE_DIR = Path.home() / ".cache" / "github-analyzer" / "llm"
+LLM_CACHE_TTL = 24 * 60 * 60  # seconds
+
+# First JSON object or array in a reply, ignoring code fences or prose around it
+_JSON_RE = re.compile(r"(\{.*\}|\[.*\])", re.S)
+
+
+def _cache_enabled() -> bool:
+    """GITHUB_CACHE_TTL=0 turns off this cache too (read at call time, after .env is loaded)"""
+    return int(os.getenv("GITHUB_CACHE_TTL", "1")) > 0
+
+
+def _cache_key(llm, messages: List[BaseMessage], key_extra: str) -> str:
+    """Hash the prompt together with the model settings that affect the reply"""
+    h = hashlib.sha256()
+    for part in (
+        str(getattr(llm, "deployment_name", "")),
+        str(getattr(llm, "temperature", "")),
+        key_extra,
+        *(f"{m.type}:{m.content}" for m in messages)
+    ):
+        h.update(part.encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def compact_json(obj: Any) -> str:
+    """Serialize prompt data as compact JSON (no indentation, non-ASCII kept as is)"""
+    return orjson.dumps(obj).decode()
+
+
+def parse_json(text: str, default: Any = None) -> Any:
+    """Extract and parse the JSON object/array in text; default if none or invalid"""
+    m = _JSON_RE.search(text)
+    if not m:
+        return default
+    try:
+        return orjson.loads(m.group(1))
+    except orjson.JSONDecodeError:
+        return default
+
+
+async def cached_invoke(llm, messages: List[BaseMessage], key_extra: str = "") -> Optional[Any]:
+    """
+    Invoke the LLM and return its parsed JSON reply, cached on disk by prompt hash
+    Returns None when the reply is not valid JSON; failed parses are not cached
+    """
+    if not _cache_enabled():
+        response = await llm.ainvoke(messages)
+        return parse_json(response.content)
+
+    cache_file = LLM_CACHE_DIR / f"{_cache_key(llm, messages, key_extra)}.json"
+
+    try:
+        if time.time() - cache_file.stat().st_mtime < LLM_CACHE_TTL:
+            return orjson.loads(cache_file.read_bytes())
+    except (OSError, orjson.JSONDecodeError):
+        pass
+
+    response = await llm.ainvoke(messages)
+    result = parse_json(response.content)
+    if result is None:
+        return None
+
+    try:
+        LLM_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        cache_file.write_bytes(orjson.dumps(result))
+    except OSError as e:
+        log.warning("  ⚠️  Could not write LLM cache: %s", e)
+    return result